@@ -1,4 +1,116 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import stat
+import time
 import requests
+from requests.adapters import HTTPAdapter
+
+# Shared session so repeated Canvas calls reuse keep-alive TLS connections.
+# The pool is sized for the thread pools used by the grader.
+def _new_session():
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=32, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_SESSION = _new_session()
+
+def _reset_session_after_fork():
+    # A forked worker must not share the parent's pooled sockets.
+    global _SESSION
+    _SESSION = _new_session()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_session_after_fork)
+
+def ensure_private_dir(path):
+    """
+    Create path (mode 0700) if needed and check that it is a real directory
+    owned by the current user and closed to other users. Raises RuntimeError
+    otherwise, so callers never trust a directory someone else controls.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if not stat.S_ISDIR(st.st_mode):
+        raise RuntimeError(f"{path} is not a directory")
+    if hasattr(os, "getuid"):
+        if st.st_uid != os.getuid():
+            raise RuntimeError(f"{path} is not owned by the current user")
+        if st.st_mode & 0o077:
+            raise RuntimeError(
+                f"{path} is accessible by other users (mode {oct(st.st_mode & 0o777)})"
+            )
+    return path
+
+def user_cache_dir(name):
+    """
+    Return ~/.cache/verilog_grader/<name>, creating both levels as private
+    directories (see ensure_private_dir).
+    """
+    root = ensure_private_dir(
+        os.path.join(os.path.expanduser("~"), ".cache", "verilog_grader")
+    )
+    return ensure_private_dir(os.path.join(root, name))
+
+# Short-lived on-disk cache for read-only listings (users, assignments) so
+# back-to-back runs do not re-fetch them from Canvas. The directory is
+# resolved on first use so importing this module does no file I/O.
+CACHE_DIR = None
+CACHE_TTL_SECONDS = 60
+
+def _cache_dir():
+    """
+    Return the per-user Canvas cache directory (~/.cache/verilog_grader/canvas),
+    checked to be private on first use. Returns None, after printing why, if
+    it is not; responses are then never cached.
+    """
+    global CACHE_DIR
+    if CACHE_DIR is None:
+        try:
+            CACHE_DIR = user_cache_dir("canvas")
+        except (OSError, RuntimeError) as e:
+            print(f"Canvas response cache disabled: {e}")
+            CACHE_DIR = ""
+    return CACHE_DIR or None
+
+def _cached_get_json(url, headers, params=None, ttl=CACHE_TTL_SECONDS):
+    """
+    GET url and return (json_body, next_page_url), reusing a cached response
+    younger than ttl seconds. The cache key covers the URL, the query params
+    and the Authorization header, so different tokens never share entries.
+    Raises requests.exceptions.RequestException on HTTP errors.
+    """
+    cache_dir = _cache_dir()
+    path = None
+    if cache_dir is not None:
+        key_src = json.dumps([url, params, headers.get("Authorization")], sort_keys=True)
+        key = hashlib.sha1(key_src.encode()).hexdigest()
+        path = os.path.join(cache_dir, f"{key}.json")
+
+        try:
+            if time.time() - os.path.getmtime(path) < ttl:
+                with open(path, "r") as f:
+                    cached = json.load(f)
+                return cached["body"], cached["next"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+    response = _SESSION.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    body = response.json()
+    next_url = response.links.get("next", {}).get("url")
+
+    if path is not None:
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"body": body, "next": next_url}, f)
+        os.replace(tmp_path, path)
+
+    return body, next_url
 
 def get_canvas_user_dict(base_url, course_id, access_token):
     """
@@ -14,21 +126,14 @@ def get_canvas_user_dict(base_url, course_id, access_token):
 
     try:
         while endpoint:
-            response = requests.get(endpoint, headers=headers)
-            response.raise_for_status()
-
-            users = response.json()
+            # Pagination is handled via Link headers; endpoint becomes None
+            # after the last page.
+            users, endpoint = _cached_get_json(endpoint, headers)
 
             # Store full user object keyed by user id
             for user in users:
                 user_dict[user['id']] = user
 
-            # Handle pagination via Link headers
-            if 'next' in response.links:
-                endpoint = response.links['next']['url']
-            else:
-                endpoint = None
-
         return user_dict
 
     except requests.exceptions.RequestException as e:
@@ -40,7 +145,7 @@ def get_student_submission(base_url, access_token, course_id, assignment_id, use
     api_endpoint = f'{base_url}/courses/{course_id}/assignments/{assignment_id}/submissions/{user_id}'
     # Make the API request and get the response
     headers = {'Authorization': f'Bearer {access_token}'}
-    response = requests.get(api_endpoint, headers=headers)
+    response = _SESSION.get(api_endpoint, headers=headers)
     # Check if the request was successful
     if response.status_code == 200:
         # The response will contain the assignment submission data in JSON format
@@ -49,26 +154,72 @@ def get_student_submission(base_url, access_token, course_id, assignment_id, use
     else:
         print(f'Error: {response.status_code} - {response.text}')
 
+def get_all_submissions(base_url, course_id, access_token, assignment_ids, user_ids=None):
+    """
+    Fetch the submissions for several assignments and students in bulk via
+    /courses/:id/students/submissions (handles pagination).
+
+    Returns a dictionary mapping:
+        (assignment_id, user_id) -> submission object (as returned by Canvas)
+
+    If user_ids is None, submissions for all students are requested
+    (student_ids[]=all). Explicit IDs must be student IDs and are sent in
+    batches to keep the query string short.
+
+    Raises requests.exceptions.RequestException if any page fails, rather
+    than returning a partial result that would look like missing submissions.
+    """
+    url = f'{base_url}/courses/{course_id}/students/submissions'
+    headers = {'Authorization': f'Bearer {access_token}'}
+
+    if user_ids is None:
+        student_batches = [['all']]
+    else:
+        user_ids = list(user_ids)
+        student_batches = [user_ids[i:i + 50] for i in range(0, len(user_ids), 50)]
+
+    submissions_by_pair = {}
+
+    for student_ids in student_batches:
+        endpoint = url
+        params = {
+            'assignment_ids[]': list(assignment_ids),
+            'student_ids[]': student_ids,
+            'per_page': 100,
+        }
+        while endpoint:
+            response = _SESSION.get(endpoint, headers=headers, params=params)
+            response.raise_for_status()
+
+            for sub in response.json():
+                submissions_by_pair[(sub['assignment_id'], sub['user_id'])] = sub
+
+            # The next-page link already carries the query string
+            endpoint = response.links.get('next', {}).get('url')
+            params = None
+
+    return submissions_by_pair
+
 def get_published_assignments_with_online_upload(base_url, course_id, api_key):
     headers = {"Authorization": f"Bearer {api_key}"}
 
     # Get list of assignments in the specified course
     url = f"{base_url}/courses/{course_id}/assignments?per_page=150"
     params = {"published": True}
-    response = requests.get(url, headers=headers, params=params)
 
-    if response.status_code == 200:
-        assignments = response.json()
-        online_upload_assignments = []
+    try:
+        assignments, _ = _cached_get_json(url, headers, params=params)
+    except requests.exceptions.RequestException as e:
+        print(f"Failed to retrieve assignments. Error: {e}")
+        return []
 
-        for assignment in assignments:
-            if assignment["submission_types"] == ["online_upload"]:
-                online_upload_assignments.append(assignment)
+    online_upload_assignments = []
 
-        return online_upload_assignments
-    else:
-        print(f"Failed to retrieve assignments. Error: {response.status_code} - {response.text}")
-        return []
+    for assignment in assignments:
+        if assignment["submission_types"] == ["online_upload"]:
+            online_upload_assignments.append(assignment)
+
+    return online_upload_assignments
 
 def get_published_assignment_ids(base_url, course_id, access_token):
     assignments = get_published_assignments_with_online_upload(base_url, access_token, course_id)
@@ -119,6 +270,18 @@ def get_attachment_urls(attachments):
             urls += [attachment["url"]]
     return urls
 
+def download_file(url, local_path, chunk_size=1 << 16):
+    """
+    Stream the file at url straight to local_path without holding the whole
+    body in memory. The bytes are written unchanged (no text decoding).
+    """
+    with _SESSION.get(url, stream=True) as response:
+        response.raise_for_status()
+        # Let urllib3 undo any gzip/deflate transfer encoding while streaming
+        response.raw.decode_content = True
+        with open(local_path, "wb") as f:
+            shutil.copyfileobj(response.raw, f, chunk_size)
+
 def get_url_contents(urls):
     response = []
     for url in urls:
@@ -181,23 +344,16 @@ def post_submission_comment(base_url, token, course_id, assignment_id, user_id,
         print(f"Error posting comment: {response.status_code} - {response.reason}")
         return False
 
+_PCT_RE = re.compile(r"(\d+\.?\d*|\.\d+)\s*%")
+
 def extract_percentage(string_with_percentage):
     """
     Extracts the number preceding the '%' symbol from a string.
     Returns the extracted number as a floating-point value.
     """
-    percentage_str = ""
-    for char in string_with_percentage:
-        if char.isdigit() or char == ".":
-            percentage_str += char
-        elif char == "%":
-            break
-        else:
-            percentage_str = ""
+    match = _PCT_RE.search(string_with_percentage)
+    if match:
+        return float(match.group(1)) / 100.0
 
-    try:
-        percentage = float(percentage_str) / 100.0
-        return percentage
-    except ValueError:
-        print("Invalid input: could not extract percentage from string.")
-        return -1
\ No newline at end of file
+    print("Invalid input: could not extract percentage from string.")
+    return -1
@@ -21,19 +21,27 @@ Requires:
 """
 
 import argparse
+import atexit
+import hashlib
+import json
 import os
-import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from functools import lru_cache
+import shutil
 import subprocess
 import sys
 import re
-import requests
+import tempfile
+import time
 
 from canvas_api import (
+    download_file,
+    get_all_submissions,
     get_canvas_user_dict,
-    get_student_submission,
     get_published_assignments_with_online_upload,
     post_grade_to_canvas,
     post_submission_comment,
+    user_cache_dir,
 )
 
 # ---------------------------------------------------------------------------
@@ -61,136 +69,447 @@ def load_config(filename):
 # ---------------------------------------------------------------------------
 # Utility: run a shell command and capture output
 # ---------------------------------------------------------------------------
-def run_cmd(cmd, cwd=None):
+def run_cmd(cmd, cwd=None, timeout=None):
+    """
+    Run cmd and return its (stdout, stderr) as raw bytes.
+    Raises RuntimeError if the command exits with a non-zero status, and
+    subprocess.TimeoutExpired (after killing it) if it runs longer than
+    timeout seconds.
+    """
     print(">>", " ".join(cmd))
-    proc = subprocess.run(
-        cmd, cwd=cwd, capture_output=True, text=True
-    )
+    proc = subprocess.run(cmd, cwd=cwd, capture_output=True, timeout=timeout)
     if proc.returncode != 0:
-        print("STDOUT:\n", proc.stdout)
-        print("STDERR:\n", proc.stderr, file=sys.stderr)
+        print("STDOUT:\n", proc.stdout.decode("utf-8", errors="replace"))
+        print("STDERR:\n", proc.stderr.decode("utf-8", errors="replace"), file=sys.stderr)
         raise RuntimeError(f"Command failed: {' '.join(cmd)}")
     return proc.stdout, proc.stderr
 
 # ---------------------------------------------------------------------------
 # Download student's Verilog attachments to a local directory
 # ---------------------------------------------------------------------------
+def student_build_dir(build_root, assignment_id, submission_json):
+    """
+    Per-student build directory. It is created only for submissions with .v
+    attachments and always holds the downloaded sources, which are needed to
+    hash and compile them. The replay files are only written when
+    REPLAY_SIM_OUTPUT is set (persistent BUILD_ROOT). The compiled simulation
+    lives in the shared compile cache unless that cache is disabled.
+    """
+    sis_id = submission_json.get("user_id", "unknown_user")
+    return os.path.join(build_root or BUILD_ROOT, f"a{assignment_id}_u{sis_id}")
+
+def _download_one(att, dest_prefix, idx, filename_prefix="dut"):
+    """
+    Download a single attachment and return its local filename.
+
+    dest_prefix is the destination directory with a trailing separator
+    (dest_dir + os.sep), computed once per directory by the caller.
+    """
+    display_name = att.get("display_name") or f"file_{idx}.v"
+    local_name = f"{filename_prefix}_{idx}_{display_name}"
+    local_path = f"{dest_prefix}{local_name}"
+
+    download_file(att["url"], local_path)
+    return local_name
+
+def _verilog_attachments(submission_json):
+    """
+    Return the submission's downloadable .v attachments, in attachment order.
+    """
+    verilog_atts = []
+    for att in submission_json.get("attachments") or []:
+        display_name = att.get("display_name") or f"file_{len(verilog_atts)}.v"
+        if not att.get("url"):
+            continue
+        if not display_name.lower().endswith(".v"):
+            continue
+        verilog_atts.append(att)
+    return verilog_atts
+
 def download_verilog_attachments(submission_json, dest_dir, filename_prefix="dut"):
     """
     Given a Canvas submission JSON, download all .v attachments
     into dest_dir and return a list of local filenames (not full paths).
+
+    Attachments are downloaded concurrently; the returned list keeps the
+    attachment order so the iverilog compile order is stable. dest_dir is
+    only created when there is at least one .v attachment to download.
     """
+    # Pick the .v attachments first so the index in each local filename
+    # does not depend on download completion order.
+    verilog_atts = _verilog_attachments(submission_json)
+    if not verilog_atts:
+        return []
+
     os.makedirs(dest_dir, exist_ok=True)
-    dut_files = []
 
-    attachments = submission_json.get("attachments", [])
-    if not attachments:
-        return dut_files
+    # Return only the filenames; we'll run iverilog with cwd=dest_dir
+    with ThreadPoolExecutor(max_workers=min(8, len(verilog_atts))) as executor:
+        return list(executor.map(
+            _download_one,
+            verilog_atts,
+            [dest_dir + os.sep] * len(verilog_atts),
+            range(len(verilog_atts)),
+            [filename_prefix] * len(verilog_atts),
+        ))
+
+def download_all_attachments(submissions, build_root, assignment_id, max_workers=32):
+    """
+    Download the .v attachments of many submissions at once, sharing one
+    thread pool (sized to the Canvas connection pool) across all of them.
 
-    idx = 0
-    for att in attachments:
-        url = att.get("url")
-        display_name = att.get("display_name") or f"file_{idx}.v"
-        if not url:
-            continue
+    submissions is an iterable of submission JSONs. Returns a dict:
+        user_id -> (build_dir, [local filenames in attachment order])
+    Students whose download failed are reported and left out.
+    """
+    downloads = {}
+    tasks = []
+    for submission_json in submissions:
+        user_id = submission_json.get("user_id", "unknown_user")
+        build_dir = student_build_dir(build_root, assignment_id, submission_json)
+        verilog_atts = _verilog_attachments(submission_json)
+        if verilog_atts:
+            os.makedirs(build_dir, exist_ok=True)
+        downloads[user_id] = (build_dir, [None] * len(verilog_atts))
+        dest_prefix = build_dir + os.sep
+        for idx, att in enumerate(verilog_atts):
+            tasks.append((user_id, idx, att, dest_prefix))
+
+    if not tasks:
+        return downloads
+
+    failed = set()
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+        futures = {
+            executor.submit(_download_one, att, dest_prefix, idx, "dut"): (user_id, idx)
+            for user_id, idx, att, dest_prefix in tasks
+        }
+        for future in as_completed(futures):
+            user_id, idx = futures[future]
+            try:
+                downloads[user_id][1][idx] = future.result()
+            except Exception as e:
+                print(f"Error downloading attachments for user_id={user_id}: {e}")
+                failed.add(user_id)
 
-        if not display_name.lower().endswith(".v"):
-            continue
+    for user_id in failed:
+        del downloads[user_id]
+    return downloads
 
-        resp = requests.get(url)
-        resp.raise_for_status()
+# ---------------------------------------------------------------------------
+# Compile cache: reuse the iverilog output for identical testbench + DUT(s)
+# ---------------------------------------------------------------------------
+def _sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def dut_file_digests(build_dir, dut_files):
+    """
+    SHA-256 hex digest of each DUT file, in compile order. Computed once per
+    submission and passed down so no file is hashed more than once.
+    """
+    return [_sha256_file(os.path.join(build_dir, name)) for name in dut_files]
+
+def _compile_cache_dir():
+    """
+    Return the per-user compile cache directory (~/.cache/verilog_grader/vvp),
+    resolving and checking it on first use in each process. Returns None,
+    after printing why, if the directory is not private to the current user;
+    builds are then not cached.
+    """
+    global COMPILE_CACHE_DIR
+    if COMPILE_CACHE_DIR is None:
+        try:
+            COMPILE_CACHE_DIR = user_cache_dir("vvp")
+        except (OSError, RuntimeError) as e:
+            print(f"Compile cache disabled: {e}")
+            COMPILE_CACHE_DIR = ""
+    return COMPILE_CACHE_DIR or None
+
+def prune_compile_cache(max_age=None):
+    """
+    Delete cached builds (and leftover temp files) not used for max_age
+    seconds (default COMPILE_CACHE_MAX_AGE), so the cache does not grow
+    without bound.
+    """
+    cache_dir = _compile_cache_dir()
+    if cache_dir is None:
+        return
+
+    cutoff = time.time() - (max_age or COMPILE_CACHE_MAX_AGE)
+    for entry in os.scandir(cache_dir):
+        try:
+            if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _compiler_id():
+    """
+    First line of `iverilog -V` (the Icarus version), read once per process.
+    Part of the compile cache key so builds from another compiler version
+    are never handed to this vvp. Empty string if iverilog cannot be run.
+    """
+    global COMPILER_ID
+    if COMPILER_ID is None:
+        # iverilog -V exits non-zero when given no sources, so the return
+        # code is ignored; the version banner is still on stdout.
+        try:
+            out = subprocess.run(
+                ["iverilog", "-V"], capture_output=True, timeout=30
+            ).stdout
+        except (OSError, subprocess.TimeoutExpired):
+            out = b""
+        lines = out.decode("utf-8", "replace").splitlines()
+        COMPILER_ID = lines[0].strip() if lines else ""
+    return COMPILER_ID
+
+def _iverilog_cmd(sim_out, dut_paths, tb_abs, top_module=None):
+    cmd_compile = ["iverilog", "-o", sim_out]
+
+    if top_module:
+        cmd_compile.extend(["-s", top_module])
+
+    cmd_compile.extend(dut_paths)      # relative names
+    cmd_compile.append(tb_abs)         # absolute
+    return cmd_compile
+
+def compile_or_cache(
+    tb_path, dut_paths, top_module=None, cwd=None, tb_digest=None, dut_digests=None
+):
+    """
+    Compile the DUT file(s) and testbench with iverilog, reusing a previous
+    build when the exact same sources were compiled before.
+
+    The cache key is a SHA-256 over the compiler version, the testbench,
+    every DUT file (in compile order) and the top module name. Builds live in _compile_cache_dir() as
+    <hash>.out. Relative dut_paths are resolved against cwd, which is also
+    the working directory used for iverilog. If no trusted cache directory
+    is available, the build goes to sim.out in cwd instead (returned as the
+    relative name, so error messages carry no per-student path).
+
+    tb_digest / dut_digests are the precomputed SHA-256 digests of the
+    testbench and DUT files; they are computed here if not given.
 
-        local_name = f"{filename_prefix}_{idx}_{display_name}"
-        local_path = os.path.join(dest_dir, local_name)
+    Returns the path of the compiled vvp file. Raises RuntimeError (from
+    run_cmd) if compilation fails.
+    """
+    base = cwd or os.getcwd()
+    tb_abs = os.path.abspath(tb_path)
+
+    cache_dir = _compile_cache_dir()
+    if cache_dir is None:
+        run_cmd(_iverilog_cmd("sim.out", dut_paths, tb_abs, top_module), cwd=base)
+        return "sim.out"
+
+    if tb_digest is None:
+        tb_digest = _sha256_file(tb_abs)
+    if dut_digests is None:
+        dut_digests = dut_file_digests(base, dut_paths)
+
+    h = hashlib.sha256()
+    h.update(_compiler_id().encode())
+    h.update(tb_digest.encode())
+    for digest in dut_digests:
+        h.update(digest.encode())
+    h.update((top_module or "").encode())
+    key = h.hexdigest()
+
+    sim_out = os.path.join(cache_dir, f"{key}.out")
+    if os.path.isfile(sim_out):
+        print(f">> compile cache hit: {sim_out}")
+        try:
+            os.utime(sim_out)   # mark as recently used for prune_compile_cache()
+        except OSError:
+            pass
+        return sim_out
+
+    # Compile to a private temp name, then rename into place atomically so
+    # concurrent workers never see a partially written file.
+    tmp_out = f"{sim_out}.{os.getpid()}.tmp"
+
+    try:
+        run_cmd(_iverilog_cmd(tmp_out, dut_paths, tb_abs, top_module), cwd=cwd)
+        os.replace(tmp_out, sim_out)
+    finally:
+        if os.path.exists(tmp_out):
+            os.remove(tmp_out)
 
-        with open(local_path, "w", encoding="utf-8") as f:
-            f.write(resp.text)
+    return sim_out
 
-        # Return only the filename; we'll run iverilog with cwd=dest_dir
-        dut_files.append(local_name)
-        idx += 1
+# ---------------------------------------------------------------------------
+# Per-student replay: skip compile + sim when the sources did not change
+# ---------------------------------------------------------------------------
+SOURCE_HASHES_FILE = ".hashes"
+SIM_STDOUT_FILE = "sim_stdout.txt"
+
+def _source_hashes(dut_files, dut_digests, tb_digest, top_module=None):
+    return {
+        "testbench": tb_digest,
+        "top_module": top_module,
+        "duts": dict(zip(dut_files, dut_digests)),
+    }
+
+def load_cached_sim_output(build_dir, source_hashes):
+    """
+    Return the simulation stdout saved by a previous run in build_dir if it
+    was produced from exactly the same sources, otherwise None.
+    """
+    hashes_path = os.path.join(build_dir, SOURCE_HASHES_FILE)
+    stdout_path = os.path.join(build_dir, SIM_STDOUT_FILE)
+    try:
+        with open(hashes_path, "r") as f:
+            previous = json.load(f)
+        if previous != source_hashes:
+            return None
+        with open(stdout_path, "rb") as f:
+            return f.read()
+    except (OSError, ValueError):
+        return None
 
-    return dut_files
+def save_sim_output(build_dir, source_hashes, sim_stdout):
+    """
+    Save the simulation stdout and the hashes of the sources that produced it.
+    The old .hashes file is removed first so an interrupted write can never
+    pair stale hashes with new output.
+    """
+    hashes_path = os.path.join(build_dir, SOURCE_HASHES_FILE)
+    if os.path.exists(hashes_path):
+        os.remove(hashes_path)
+    with open(os.path.join(build_dir, SIM_STDOUT_FILE), "wb") as f:
+        f.write(sim_stdout)
+    with open(hashes_path, "w") as f:
+        json.dump(source_hashes, f)
 
 # ---------------------------------------------------------------------------
 # Grade a single submission using Icarus Verilog and a given testbench
 # ---------------------------------------------------------------------------
+# One match (the whole line) per simulator output line carrying a [PASS] or
+# [FAIL] marker. A line counts as passed if "[PASS]" appears anywhere in it.
+_RESULT_RE = re.compile(rb"^[^\n]*\[(?:PASS|FAIL)\][^\n]*", re.M)
+
 def grade_submission_with_iverilog(
     assignment_id,
     points_possible,
     submission_json,
     testbench_path,
     top_module=None,
+    build_root=None,
+    sim_timeout=None,
+    replay=None,
 ):
     """
-    Compile and run the student's Verilog submission with the given testbench.
+    Download, compile and run the student's Verilog submission with the
+    given testbench.
 
     If top_module is None, we do NOT pass -s to iverilog, and let Icarus infer
     the top-level module from the design (the testbench should be the root).
+
+    build_root defaults to BUILD_ROOT, sim_timeout to SIM_TIMEOUT and replay
+    to REPLAY_SIM_OUTPUT. Pass them explicitly when calling from a worker
+    process, where _init_config() has not run.
     """
     if submission_json is None:
         return 0.0, "No submission found."
 
-    # Make a per-student build directory
-    sis_id = submission_json.get("user_id", "unknown_user")
-    build_dir = os.path.join(BUILD_ROOT, f"a{assignment_id}_u{sis_id}")
-    os.makedirs(build_dir, exist_ok=True)
-
-    # 1) Download DUT files
+    # 1) Download DUT files (the build directory is only created once there
+    #    is a .v file to put in it)
+    build_dir = student_build_dir(build_root, assignment_id, submission_json)
     dut_files = download_verilog_attachments(submission_json, build_dir, "dut")
-    if not dut_files:
-        return 0.0, "No Verilog (.v) attachments found in submission."
 
-    if not os.path.isfile(testbench_path):
-        return 0.0, f"Testbench not found on server: {testbench_path}"
+    return grade_dut_files(
+        build_dir, dut_files, points_possible, testbench_path, top_module,
+        sim_timeout=sim_timeout, replay=replay,
+    )
 
-    # 2) Compile with iverilog
-    sim_out = os.path.join(build_dir, "sim.out")
-    cmd_compile = ["iverilog", "-o", sim_out]
+def grade_dut_files(
+    build_dir,
+    dut_files,
+    points_possible,
+    testbench_path,
+    top_module=None,
+    sim_timeout=None,
+    dut_digests=None,
+    replay=None,
+):
+    """
+    Compile and run already-downloaded DUT file(s) (names relative to
+    build_dir) with the given testbench and return (score, comment).
 
-    if top_module:
-        cmd_compile.extend(["-s", top_module])
+    dut_digests are the files' SHA-256 digests if the caller already has
+    them (see dut_file_digests); otherwise they are computed here.
 
-    cmd_compile.extend(dut_files)                  # relative names
-    cmd_compile.append(os.path.abspath(testbench_path))  # absolute
+    The simulation is killed after sim_timeout seconds (default SIM_TIMEOUT)
+    so a design that never reaches $finish cannot stall the grader.
 
-    try:
-        stdout_compile, stderr_compile = run_cmd(cmd_compile, cwd=build_dir)
-    except Exception as e:
-        comment = f"Compilation failed:\n{str(e)}"
-        return 0.0, comment
+    If replay is true (default REPLAY_SIM_OUTPUT), the simulation output is
+    saved in build_dir and replayed on a later run with unchanged sources.
+    This is only useful when build_dir outlives the run.
+    """
+    if not dut_files:
+        return 0.0, "No Verilog (.v) attachments found in submission."
 
+    if not os.path.isfile(testbench_path):
+        return 0.0, f"Testbench not found on server: {testbench_path}"
 
-    # 3) Run the simulation
-    try:
-        sim_stdout, sim_stderr = run_cmd(["vvp", sim_out], cwd=build_dir)
-    except Exception as e:
-        comment = f"Simulation failed:\n{str(e)}"
-        return 0.0, comment
+    tb_digest = _sha256_file(testbench_path)
+    if dut_digests is None:
+        dut_digests = dut_file_digests(build_dir, dut_files)
+
+    if replay is None:
+        replay = REPLAY_SIM_OUTPUT
+
+    # If this student's sources are unchanged since the last run, replay the
+    # saved simulation output instead of compiling and simulating again.
+    sim_stdout = None
+    if replay:
+        source_hashes = _source_hashes(dut_files, dut_digests, tb_digest, top_module)
+        sim_stdout = load_cached_sim_output(build_dir, source_hashes)
+
+    if sim_stdout is None:
+        # 2) Compile with iverilog (or reuse a cached build of the same sources)
+        try:
+            sim_out = compile_or_cache(
+                testbench_path, dut_files, top_module=top_module, cwd=build_dir,
+                tb_digest=tb_digest, dut_digests=dut_digests,
+            )
+        except Exception as e:
+            comment = f"Compilation failed:\n{str(e)}"
+            return 0.0, comment
+
+        # 3) Run the simulation
+        try:
+            sim_stdout, sim_stderr = run_cmd(
+                ["vvp", sim_out], cwd=build_dir, timeout=sim_timeout or SIM_TIMEOUT
+            )
+        except subprocess.TimeoutExpired as e:
+            return 0.0, f"Simulation timed out after {e.timeout:g}s"
+        except Exception as e:
+            comment = f"Simulation failed:\n{str(e)}"
+            return 0.0, comment
+
+        if replay:
+            save_sim_output(build_dir, source_hashes, sim_stdout)
+    else:
+        print(f">> sources unchanged, reusing simulation output in {build_dir}")
 
     # 4) Parse test result lines (marked with [PASS] or [FAIL])
-    results = []
-    for line in sim_stdout.splitlines():
-        if "[PASS]" in line or "[FAIL]" in line:
-            results.append(line.strip())
+    lines = _RESULT_RE.findall(sim_stdout)
 
-    if not results:
+    if not lines:
         # No structured results; include raw stdout to help debug
         comment = (
             "No test results found in simulation output (looking for [PASS] or [FAIL] markers).\n\n"
             "Raw simulation output:\n"
-            + sim_stdout
+            + sim_stdout.decode("utf-8", errors="replace")
         )
         return 0.0, comment
 
-    total = 0
-    passed = 0
-    details_lines = []
-    for r in results:
-        total += 1
-        details_lines.append(r)
-        if "[PASS]" in r:
-            passed += 1
+    total = len(lines)
+    passed = sum(1 for line in lines if b"[PASS]" in line)
 
     fraction = passed / total if total > 0 else 0.0
     score = fraction * float(points_possible)
@@ -199,7 +518,8 @@ def grade_submission_with_iverilog(
         f"Autograded Verilog assignment.\n"
         f"Tests passed: {passed}/{total} ({fraction*100:.1f}%).\n"
         f"Score: {score:.2f} / {points_possible}.\n\n"
-        "Details:\n" + "\n".join(details_lines)
+        "Details:\n"
+        + b"\n".join(line.strip() for line in lines).decode("utf-8", errors="replace")
     )
 
     return score, comment
@@ -218,6 +538,7 @@ def get_assignments_by_id(base_url, course_id, api_key, assignment_ids):
     by_id = {a["id"]: a for a in all_assignments}
     return {aid: by_id[aid] for aid in assignment_ids if aid in by_id}
 
+@lru_cache(maxsize=128)
 def get_testbench_for_assignment(assignment_id):
     """
     Look for a folder named after the assignment ID inside TESTBENCH_DIR.
@@ -235,6 +556,10 @@ def get_testbench_for_assignment(assignment_id):
             - Print an error and return None
         * If one or more:
             - Sort them and return the first one
+
+    The result (including None) is cached per assignment ID for the life of
+    the process; call get_testbench_for_assignment.cache_clear() after
+    changing the testbenches folder in a long-running session.
     """
     tb_dir = os.path.join(TESTBENCH_DIR, str(assignment_id))
 
@@ -278,6 +603,9 @@ def main():
     )
     args = parser.parse_args()
 
+    _init_config()
+    prune_compile_cache()
+
     # Determine assignment IDs: CLI override, else config
     if args.assignments:
         assignment_ids = [
@@ -308,6 +636,18 @@ def main():
         print("No matching assignments found with online_upload type.")
         sys.exit(1)
 
+    # Load every (assignment, student) submission in a few bulk requests.
+    # /users also lists teachers and observers, so ask Canvas for all
+    # students rather than passing those IDs. Without a complete set of
+    # submissions, nobody can be graded reliably, so a failure stops the run.
+    try:
+        submissions = get_all_submissions(
+            BASE_URL, COURSE_ID, CANVAS_API_KEY, list(assignments)
+        )
+    except Exception as e:
+        print(f"Error retrieving submissions from Canvas: {e}")
+        sys.exit(1)
+
     for assignment_id in assignment_ids:
         if assignment_id not in assignments:
             print(f"Assignment {assignment_id} not found or not online_upload; skipping.")
@@ -329,19 +669,13 @@ def main():
             continue
 
 
-        # For each student, get submission and grade if submitted
+        # For each student, look up the submission and queue it for grading
+        jobs = []
         for user_id, user_obj in users.items():
             student_id = user_obj["id"]
             student_name = user_obj["name"]
 
-            try:
-                submission = get_student_submission(
-                    BASE_URL, CANVAS_API_KEY, COURSE_ID, assignment_id, student_id
-                )
-            except Exception as e:
-                print(f"Error retrieving submission for {student_name}: {e}")
-                continue
-
+            submission = submissions.get((assignment_id, student_id))
             if not submission:
                 print(f"No submission for {student_name}")
                 continue
@@ -356,52 +690,153 @@ def main():
                 # Already graded; skip to avoid overwriting unless you want to
                 continue
 
-            print(f"  Grading submission for {student_name} (user_id={student_id})")
+            jobs.append((student_id, student_name, submission))
 
-            score, comment = grade_submission_with_iverilog(
-                assignment_id=assignment_id,
-                points_possible=points_possible,
-                submission_json=submission,
-                testbench_path=tb_file,
-                # top_module=None  # optional, default is None
-            )
+        if not jobs:
+            continue
 
-            # Display results in terminal
-            print(f"    -> Score: {score:.2f} / {points_possible}")
-            print(f"    -> Feedback:\n{comment}")
-            print()
+        # Download every student's attachments up front in one shared I/O
+        # pool, then hand only the compile/sim work to the process pool.
+        downloads = download_all_attachments(
+            [submission for _, _, submission in jobs], BUILD_ROOT, assignment_id
+        )
 
-            # Post grade + comment back to Canvas
-            try:
-                post_grade_to_canvas(
-                    BASE_URL, COURSE_ID, assignment_id, student_id, score, CANVAS_API_KEY
-                )
-                post_submission_comment(
-                    BASE_URL, CANVAS_API_KEY, COURSE_ID, assignment_id, student_id, comment
+        # Each submission is an independent iverilog + vvp run, so grade them
+        # in parallel worker processes. Canvas writes stay in this process.
+        # Submissions whose DUT files have the same local names and are
+        # byte-for-byte identical share a single grading run. The names are
+        # part of the key because compiler messages in the comment quote them.
+        with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+            seen = {}      # ((name, digest), ...) -> future
+            futures = {}   # future -> [(student_id, student_name), ...]
+            for student_id, student_name, submission in jobs:
+                download = downloads.get(submission.get("user_id"))
+                if download is None:
+                    # Download error already reported
+                    continue
+                build_dir, dut_files = download
+
+                dut_digests = dut_file_digests(build_dir, dut_files)
+                dut_key = tuple(zip(dut_files, dut_digests))
+                if dut_key in seen:
+                    print(
+                        f"  Submission for {student_name} (user_id={student_id}) "
+                        "is identical to one already queued; reusing its result"
+                    )
+                    futures[seen[dut_key]].append((student_id, student_name))
+                    continue
+
+                print(f"  Grading submission for {student_name} (user_id={student_id})")
+                future = executor.submit(
+                    grade_dut_files,
+                    build_dir=build_dir,
+                    dut_files=dut_files,
+                    points_possible=points_possible,
+                    testbench_path=tb_file,
+                    # top_module=None  # optional, default is None
+                    sim_timeout=SIM_TIMEOUT,
+                    dut_digests=dut_digests,
+                    replay=REPLAY_SIM_OUTPUT,
                 )
-                print(f"    ✓ Grade and feedback posted to Canvas")
-            except Exception as e:
-                print(f"    Error posting grade/comment for {student_name}: {e}")
-
+                seen[dut_key] = future
+                futures[future] = [(student_id, student_name)]
+
+            for future in as_completed(futures):
+                try:
+                    score, comment = future.result()
+                except Exception as e:
+                    for student_id, student_name in futures[future]:
+                        print(f"    Error grading submission for {student_name}: {e}")
+                    continue
+
+                for student_id, student_name in futures[future]:
+                    # Display results in terminal
+                    print(f"  Results for {student_name} (user_id={student_id})")
+                    print(f"    -> Score: {score:.2f} / {points_possible}")
+                    print(f"    -> Feedback:\n{comment}")
+                    print()
+
+                    # Post grade + comment back to Canvas
+                    try:
+                        post_grade_to_canvas(
+                            BASE_URL, COURSE_ID, assignment_id, student_id, score, CANVAS_API_KEY
+                        )
+                        post_submission_comment(
+                            BASE_URL, CANVAS_API_KEY, COURSE_ID, assignment_id, student_id, comment
+                        )
+                        print(f"    ✓ Grade and feedback posted to Canvas")
+                    except Exception as e:
+                        print(f"    Error posting grade/comment for {student_name}: {e}")
 
-CONFIG = load_config("config.txt")
-CANVAS_API_KEY = CONFIG.get("CANVAS_API_KEY")
-BASE_URL = CONFIG.get("BASE_URL")
-COURSE_ID = int(CONFIG.get("COURSE_ID").strip("'"))
-
-# parse assignment IDs from config
-# Example in config.txt:
-# VERILOG_ASSIGNMENT_IDS = 12345,23456,34567
-_assignment_ids_str = CONFIG.get("VERILOG_ASSIGNMENT_IDS", "")
-CONFIG_ASSIGNMENT_IDS = [
-    int(x.strip()) for x in _assignment_ids_str.split(",") if x.strip()
-]
+# ---------------------------------------------------------------------------
+# Config / globals (filled in by _init_config() when main() starts, so that
+# importing this module, e.g. in grading worker processes, does no file I/O)
+# ---------------------------------------------------------------------------
+CONFIG = {}
+CANVAS_API_KEY = None
+BASE_URL = None
+COURSE_ID = None
+CONFIG_ASSIGNMENT_IDS = []
 
 TESTBENCH_DIR = "testbenches"
-BUILD_ROOT    = os.path.abspath("verilog_build")
+BUILD_ROOT    = None
+COMPILE_CACHE_DIR = None   # resolved on first use, see _compile_cache_dir()
+COMPILE_CACHE_MAX_AGE = 7 * 24 * 3600   # seconds a cached build may go unused
+COMPILER_ID = None   # first line of `iverilog -V`, see _compiler_id()
+SIM_TIMEOUT   = 60   # seconds per vvp run; SIM_TIMEOUT in config.txt overrides
+REPLAY_SIM_OUTPUT = False   # True when BUILD_ROOT persists between runs
+
+def _init_config(filename="config.txt"):
+    global CONFIG, CANVAS_API_KEY, BASE_URL, COURSE_ID, CONFIG_ASSIGNMENT_IDS
+    global BUILD_ROOT, SIM_TIMEOUT, REPLAY_SIM_OUTPUT
+
+    CONFIG = load_config(filename)
+    CANVAS_API_KEY = CONFIG.get("CANVAS_API_KEY")
+    BASE_URL = CONFIG.get("BASE_URL")
+    COURSE_ID = int(CONFIG.get("COURSE_ID").strip("'"))
+
+    # parse assignment IDs from config
+    # Example in config.txt:
+    # VERILOG_ASSIGNMENT_IDS = 12345,23456,34567
+    assignment_ids_str = CONFIG.get("VERILOG_ASSIGNMENT_IDS", "")
+    CONFIG_ASSIGNMENT_IDS = [
+        int(x.strip()) for x in assignment_ids_str.split(",") if x.strip()
+    ]
+
+    try:
+        SIM_TIMEOUT = float(CONFIG.get("SIM_TIMEOUT", SIM_TIMEOUT))
+    except ValueError:
+        SIM_TIMEOUT = 0
+    if not SIM_TIMEOUT > 0:
+        print(
+            f"Invalid SIM_TIMEOUT in {filename}: {CONFIG.get('SIM_TIMEOUT')!r}.\n"
+            "It must be a number of seconds greater than 0."
+        )
+        sys.exit(1)
 
-os.makedirs(TESTBENCH_DIR, exist_ok=True)
-os.makedirs(BUILD_ROOT, exist_ok=True)
+    # Build artifacts are small, numerous and only needed for this run, so
+    # keep them in RAM (tmpfs) when available and remove them on exit.
+    # Set BUILD_ROOT in config.txt to keep builds on disk between runs; only
+    # then is the per-student replay of unchanged submissions worth doing.
+    # The tmpfs directory comes from mkdtemp: private (0700) and with an
+    # unpredictable name, so other users can neither block nor tamper with it.
+    BUILD_ROOT = None
+    REPLAY_SIM_OUTPUT = True
+    if CONFIG.get("BUILD_ROOT"):
+        BUILD_ROOT = os.path.abspath(CONFIG["BUILD_ROOT"])
+    elif os.path.isdir("/dev/shm"):
+        try:
+            BUILD_ROOT = tempfile.mkdtemp(prefix="verilog_grader-", dir="/dev/shm")
+        except OSError as e:
+            print(f"Could not create a build folder in /dev/shm ({e}); using ./verilog_build")
+        else:
+            atexit.register(shutil.rmtree, BUILD_ROOT, ignore_errors=True)
+            REPLAY_SIM_OUTPUT = False
+    if BUILD_ROOT is None:
+        BUILD_ROOT = os.path.abspath("verilog_build")
+
+    os.makedirs(TESTBENCH_DIR, exist_ok=True)
+    os.makedirs(BUILD_ROOT, exist_ok=True)
 
 if __name__ == "__main__":
     main()